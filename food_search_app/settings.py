@@ -51,6 +51,10 @@ REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
         'rest_framework_simplejwt.authentication.JWTAuthentication',
     ),
+    'DEFAULT_RENDERER_CLASSES': (
+        'menu.renderers.ORJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ),
 }
 
 # Simple JWT Authentication
@@ -102,6 +106,21 @@ DATABASES = {
         'PASSWORD': 'admin123',
         'HOST': 'localhost',
         'PORT': '3306',
+        'TEST': {
+            # The menu tables predate its migrations (0001 creates them unmanaged),
+            # so the test database is built straight from the models. The
+            # migrations are run by menu.tests.MenuMigrationTests instead.
+            'MIGRATE': False,
+        },
+    }
+}
+
+# Redis cache, used for product list responses
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+        'LOCATION': 'redis://127.0.0.1:6379',
     }
 }
 
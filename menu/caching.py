@@ -0,0 +1,75 @@
+import hashlib
+import json
+import logging
+import time
+from django.core.cache import cache
+
+logger = logging.getLogger(__name__)
+
+# How long a cached product list response stays valid, in seconds
+PRODUCTS_CACHE_TIMEOUT = 300
+
+# Bumped on every catalog change; old entries stop being read and expire on their own
+PRODUCTS_CACHE_VERSION_KEY = 'products:version'
+
+
+def get_products_cache_version():
+    """
+    Return the current product cache version, creating one if none is set.
+    """
+    return cache.get_or_set(PRODUCTS_CACHE_VERSION_KEY, time.time_ns, None)
+
+
+def get_products_cache_key(request):
+    """
+    Build the cache key for a product list request.
+
+    The key combines the current cache version with a hash of the request's
+    scheme, host and path and its query parameters (filters, page size and
+    cursor), so identical requests share an entry regardless of parameter
+    order. The scheme and host are part of the key because cached responses
+    contain absolute `next`/`previous` links.
+    """
+    query_params = sorted(request.query_params.lists())
+    key_data = [request.scheme, request.get_host(), request.path, query_params]
+    digest = hashlib.blake2b(json.dumps(key_data).encode(), digest_size=16).hexdigest()
+    return f'products:{get_products_cache_version()}:{digest}'
+
+
+def get_cached_products(request):
+    """
+    Return the cache key and the cached response data for a product list request.
+
+    The cache is best effort: if it cannot be reached (e.g. Redis is down), the
+    error is logged and `(None, None)` is returned so the list is served uncached.
+    """
+    try:
+        cache_key = get_products_cache_key(request)
+        return cache_key, cache.get(cache_key)
+    except Exception:
+        logger.warning('Product cache unavailable; serving the list uncached.', exc_info=True)
+        return None, None
+
+
+def cache_products(cache_key, data):
+    """
+    Cache product list response data under `cache_key`, if the cache is reachable.
+    """
+    if cache_key is None:
+        return
+    try:
+        cache.set(cache_key, data, PRODUCTS_CACHE_TIMEOUT)
+    except Exception:
+        logger.warning('Product cache unavailable; list response not cached.', exc_info=True)
+
+
+def invalidate_products_cache():
+    """
+    Invalidate every cached product list response by moving to a new version.
+
+    A cache that cannot be reached holds nothing to serve, so the error is only logged.
+    """
+    try:
+        cache.set(PRODUCTS_CACHE_VERSION_KEY, time.time_ns(), None)
+    except Exception:
+        logger.warning('Product cache unavailable; could not invalidate cached lists.', exc_info=True)
@@ -0,0 +1,43 @@
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('menu', '0002_alter_products_options_alter_producttoppings_options_and_more'),
+    ]
+
+    operations = [
+        # These foreign key columns already exist in the database; bring the
+        # migration state in line with the models without touching the schema.
+        migrations.SeparateDatabaseAndState(
+            state_operations=[
+                migrations.AddField(
+                    model_name='producttoppings',
+                    name='product',
+                    field=models.ForeignKey(on_delete=django.db.models.deletion.DO_NOTHING, to='menu.products'),
+                ),
+                migrations.AddField(
+                    model_name='producttoppings',
+                    name='topping',
+                    field=models.ForeignKey(on_delete=django.db.models.deletion.DO_NOTHING, to='menu.toppings'),
+                ),
+                migrations.AddField(
+                    model_name='ratings',
+                    name='product',
+                    field=models.ForeignKey(on_delete=django.db.models.deletion.DO_NOTHING, to='menu.products'),
+                ),
+                migrations.AddField(
+                    model_name='toppings',
+                    name='group',
+                    field=models.ForeignKey(on_delete=django.db.models.deletion.DO_NOTHING, to='menu.producttoppings'),
+                ),
+            ],
+        ),
+        migrations.AlterField(
+            model_name='products',
+            name='product_type',
+            field=models.CharField(choices=[('Veg', 'Veg'), ('Non-Veg', 'Non-Veg')], db_index=True, max_length=7),
+        ),
+    ]
@@ -0,0 +1,20 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('menu', '0003_products_type_index'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='producttoppings',
+            index=models.Index(fields=['product', 'topping'], name='product_toppings_prod_top_idx'),
+        ),
+        migrations.AlterField(
+            model_name='toppings',
+            name='topping_name',
+            field=models.CharField(db_index=True, max_length=100),
+        ),
+    ]
@@ -0,0 +1,23 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('menu', '0004_toppings_filter_indexes'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='products',
+            index=models.Index(fields=['product_price'], name='products_price_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='products',
+            index=models.Index(fields=['product_category', 'product_type'], name='products_category_type_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='ratings',
+            index=models.Index(fields=['product', 'rating_value'], name='ratings_product_value_idx'),
+        ),
+    ]
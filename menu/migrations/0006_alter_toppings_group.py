@@ -0,0 +1,40 @@
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def clear_stale_toppings_group(apps, schema_editor):
+    """
+    Null every toppings.group_id that has no matching toppings_groups row.
+
+    group used to reference product_toppings, so these ids cannot satisfy the
+    new foreign key. This DELETES DATA: the cleared links are lost and are not
+    restored when the migration is reversed. Ids that already match a
+    toppings_groups row are kept.
+    """
+    Toppings = apps.get_model('menu', 'Toppings')
+    ToppingsGroups = apps.get_model('menu', 'ToppingsGroups')
+    Toppings.objects.filter(group__isnull=False).exclude(
+        group_id__in=ToppingsGroups.objects.values('pk')
+    ).update(group=None)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('menu', '0005_products_ratings_filter_indexes'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='toppings',
+            name='group',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.DO_NOTHING, to='menu.producttoppings'),
+        ),
+        # Irreversible data loss for stale group ids, see clear_stale_toppings_group
+        migrations.RunPython(clear_stale_toppings_group, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='toppings',
+            name='group',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.DO_NOTHING, to='menu.toppingsgroups'),
+        ),
+    ]
@@ -0,0 +1,29 @@
+from django.db import migrations, models
+from django.db.models import Avg, OuterRef, Subquery
+
+
+def populate_product_avg_rating(apps, schema_editor):
+    Products = apps.get_model('menu', 'Products')
+    Ratings = apps.get_model('menu', 'Ratings')
+    # One UPDATE for every product; unrated products stay NULL
+    avg_rating = Ratings.objects.filter(product=OuterRef('pk')).values('product').annotate(
+        avg_rating=Avg('rating_value')
+    ).values('avg_rating')
+    Products.objects.update(product_avg_rating=Subquery(avg_rating))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('menu', '0006_alter_toppings_group'),
+    ]
+
+    operations = [
+        # Wide enough for averages of any rating_value (up to 99.9)
+        migrations.AddField(
+            model_name='products',
+            name='product_avg_rating',
+            field=models.DecimalField(blank=True, db_index=True, decimal_places=4, max_digits=6, null=True),
+        ),
+        migrations.RunPython(populate_product_avg_rating, migrations.RunPython.noop),
+    ]
@@ -14,6 +14,9 @@ class ProductToppings(models.Model):
     class Meta:
         managed = True
         db_table = 'product_toppings'
+        indexes = [
+            models.Index(fields=['product', 'topping'], name='product_toppings_prod_top_idx'),
+        ]
 
 
 class Products(models.Model):
@@ -24,11 +27,18 @@ class Products(models.Model):
     product_description = models.CharField(max_length=255)
     product_price = models.DecimalField(decimal_places=2, max_digits=5)
     product_category = models.CharField(max_length=100)
-    product_type = models.CharField(max_length=7, choices=PRODUCT_TYPE)
+    product_type = models.CharField(max_length=7, choices=PRODUCT_TYPE, db_index=True)
+    # Average of the product's ratings, kept up to date by signals on Ratings (NULL if unrated)
+    product_avg_rating = models.DecimalField(max_digits=6, decimal_places=4, null=True, blank=True, db_index=True)
 
     class Meta:
         managed = True
         db_table = 'products'
+        indexes = [
+            models.Index(fields=['product_price'], name='products_price_idx'),
+            # Also serves category-only lookups through its leftmost column
+            models.Index(fields=['product_category', 'product_type'], name='products_category_type_idx'),
+        ]
 
 
 class Ratings(models.Model):
@@ -39,12 +49,15 @@ class Ratings(models.Model):
     class Meta:
         managed = True
         db_table = 'ratings'
+        indexes = [
+            models.Index(fields=['product', 'rating_value'], name='ratings_product_value_idx'),
+        ]
 
 
 class Toppings(models.Model):
     topping_id = models.AutoField(primary_key=True)
-    group = models.ForeignKey(ProductToppings, models.DO_NOTHING)
-    topping_name = models.CharField(max_length=100)
+    group = models.ForeignKey('ToppingsGroups', models.DO_NOTHING, null=True, blank=True)
+    topping_name = models.CharField(max_length=100, db_index=True)
 
     class Meta:
         managed = True
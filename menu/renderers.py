@@ -0,0 +1,27 @@
+import orjson
+from rest_framework.renderers import BaseRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+# DRF's encoder handles the types orjson does not, such as Decimal and lazy strings
+_json_encoder = JSONEncoder()
+
+
+class ORJSONRenderer(BaseRenderer):
+    """
+    Renderer which serializes responses to JSON using orjson.
+
+    Values orjson cannot serialize natively fall back to DRF's JSONEncoder, so
+    the output matches the default JSONRenderer (e.g. Decimal ratings render
+    as numbers, DecimalField prices as strings).
+    """
+    media_type = 'application/json'
+    format = 'json'
+    charset = None
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        # The browsable API asks for indented output
+        renderer_context = renderer_context or {}
+        option = orjson.OPT_INDENT_2 if renderer_context.get('indent') else 0
+        return orjson.dumps(data, default=_json_encoder.default, option=option)
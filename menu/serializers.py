@@ -1,4 +1,8 @@
+from collections import defaultdict
+from django.db import models
 from rest_framework import serializers
+from rest_framework.fields import SkipField
+from rest_framework.relations import PKOnlyObject
 from .models import Products, Toppings, Ratings, ProductToppings
 
 class RatingSerialzier(serializers.ModelSerializer):
@@ -6,6 +10,72 @@ class RatingSerialzier(serializers.ModelSerializer):
         model = Ratings
         fields = '__all__'
 
+def attach_related_values(products, ratings=True, toppings=True):
+    """
+    Attach `_ratings` and `_toppings` lists to each product in a batch, which
+    `ProductSerializer` reads as plain attributes.
+
+    Runs one `values_list` query per relation for the whole batch, so no
+    `Ratings`, `ProductToppings` or `Toppings` instances are built.
+
+    Args:
+        products: The product instances to attach values to.
+        ratings: Whether to load ratings.
+        toppings: Whether to load toppings.
+    """
+    product_ids = [product.product_id for product in products]
+    if ratings:
+        product_ratings = defaultdict(list)
+        rating_rows = Ratings.objects.filter(product_id__in=product_ids).values_list('product_id', 'rating_value')
+        for product_id, rating_value in rating_rows:
+            product_ratings[product_id].append(rating_value)
+        for product in products:
+            product._ratings = product_ratings[product.product_id]
+
+    if toppings:
+        product_toppings = defaultdict(list)
+        topping_rows = ProductToppings.objects.filter(product_id__in=product_ids).values_list(
+            'product_id', 'topping__topping_name'
+        )
+        for product_id, topping_name in topping_rows:
+            product_toppings[product_id].append(topping_name)
+        for product in products:
+            product._toppings = product_toppings[product.product_id]
+
+class ProductListSerializer(serializers.ListSerializer):
+    """
+    List serializer for products that resolves the child's readable fields once
+    per batch and reuses them for every row, instead of walking the field
+    machinery again for each product.
+
+    Ratings and toppings for the whole batch are loaded up front by
+    `attach_related_values`.
+    """
+    def to_representation(self, data):
+        iterable = list(data.all() if isinstance(data, models.manager.BaseManager) else data)
+        fields = list(self.child._readable_fields)
+        field_names = {field.field_name for field in fields}
+        if iterable:
+            attach_related_values(
+                iterable,
+                ratings='product_rating' in field_names,
+                toppings='product_toppings' in field_names
+            )
+        representation = []
+        for item in iterable:
+            row = {}
+            for field in fields:
+                try:
+                    attribute = field.get_attribute(item)
+                except SkipField:
+                    continue
+                # Same None check as Serializer.to_representation: a related field
+                # with no value comes back as a PKOnlyObject whose pk is None
+                check_for_none = attribute.pk if isinstance(attribute, PKOnlyObject) else attribute
+                row[field.field_name] = None if check_for_none is None else field.to_representation(attribute)
+            representation.append(row)
+        return representation
+
 class ProductSerializer(serializers.ModelSerializer):
     product_rating = serializers.SerializerMethodField()
     product_toppings = serializers.SerializerMethodField()
@@ -13,20 +83,36 @@ class ProductSerializer(serializers.ModelSerializer):
         model = Products
         fields = ['product_id', 'product_name', 'product_description', 'product_price', 
                   'product_category','product_toppings','product_rating', 'product_type']
+        list_serializer_class = ProductListSerializer
+
+    def __init__(self, *args, **kwargs):
+        # Optional sparse fieldset, e.g. from the `fields` query parameter
+        fields = kwargs.pop('fields', None)
+        super().__init__(*args, **kwargs)
+        if fields is not None:
+            for field_name in set(self.fields) - set(fields):
+                self.fields.pop(field_name)
+
+    def to_representation(self, instance):
+        # Load whichever related values were not attached by a list yet, through
+        # the same batched queries as a list, as a batch of one
+        ratings = 'product_rating' in self.fields and not hasattr(instance, '_ratings')
+        toppings = 'product_toppings' in self.fields and not hasattr(instance, '_toppings')
+        if ratings or toppings:
+            attach_related_values([instance], ratings=ratings, toppings=toppings)
+        return super().to_representation(instance)
 
     def get_product_rating(self, obj):
-        # Fetch ratings for the current product
-        ratings = Ratings.objects.filter(product=obj.product_id)
-        # Return the rating values or an average
-        return [product_rating.rating_value for product_rating in ratings]
+        # Ratings attached by attach_related_values
+        return obj._ratings
 
     def get_product_toppings(self, obj):
         """
-        Fetch related toppings for a product using raw SQL.
+        Fetch related toppings for a product.
 
         This method retrieves the names of all toppings associated with a product.
-        It uses raw SQL to query the `product_toppings` and `toppings` tables directly
-        since the `ProductToppings` model is unmanaged (`managed = False`).
+        Toppings are loaded for the whole batch (or the single product) by
+        `attach_related_values` and attached as `_toppings`.
 
         Args:
             obj: The current product object being serialized.
@@ -34,20 +120,7 @@ class ProductSerializer(serializers.ModelSerializer):
         Returns:
             A list of topping names (strings) associated with the given product.
         """
-        # Fetch related toppings using raw SQL for unmanaged models
-        from django.db import connection
-        with connection.cursor() as cursor:
-            cursor.execute(
-                """
-                SELECT t.topping_name 
-                FROM product_toppings pt
-                JOIN toppings t ON pt.topping_id = t.topping_id
-                WHERE pt.product_id = %s
-                """,
-                [obj.product_id]
-            )
-            toppings = [row[0] for row in cursor.fetchall()]
-        return toppings
+        return obj._toppings
     
 class ToppingsSerializer(serializers.ModelSerializer):
     class Meta:
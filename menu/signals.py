@@ -0,0 +1,57 @@
+from django.db.models import Avg, OuterRef, Subquery
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+from .caching import invalidate_products_cache
+from .models import Products, ProductToppings, Ratings, Toppings
+
+
+def update_avg_ratings(product_ids):
+    """
+    Recompute `product_avg_rating` for the given products.
+
+    The average is computed and written by a single UPDATE with a correlated
+    subquery, so no average read by an earlier statement can be written back
+    after a concurrent rating change.
+    Products without ratings are set to NULL.
+    """
+    avg_rating = Ratings.objects.filter(product=OuterRef('pk')).values('product').annotate(
+        avg_rating=Avg('rating_value')
+    ).values('avg_rating')
+    Products.objects.filter(pk__in=product_ids).update(product_avg_rating=Subquery(avg_rating))
+
+
+@receiver(pre_save, sender=Ratings)
+def remember_rated_product(sender, instance, raw=False, **kwargs):
+    """
+    Remember which product an existing rating belonged to before it is saved,
+    so moving it to another product also recomputes the old product.
+    """
+    if raw or instance.pk is None:
+        return
+    instance._previous_product_id = Ratings.objects.filter(pk=instance.pk).values_list(
+        'product_id', flat=True
+    ).first()
+
+
+@receiver([post_save, post_delete], sender=Ratings)
+def update_product_avg_rating(sender, instance, raw=False, **kwargs):
+    """
+    Recompute the average rating of the product whose rating changed, and of
+    the product it was moved away from, if any. Skipped for fixture loading.
+    """
+    if raw:
+        return
+    product_ids = {instance.product_id, getattr(instance, '_previous_product_id', None)}
+    product_ids.discard(None)
+    update_avg_ratings(product_ids)
+
+
+@receiver([post_save, post_delete], sender=Products)
+@receiver([post_save, post_delete], sender=Ratings)
+@receiver([post_save, post_delete], sender=ProductToppings)
+@receiver([post_save, post_delete], sender=Toppings)
+def clear_products_cache(sender, **kwargs):
+    """
+    Drop cached product lists whenever a product, rating or topping changes.
+    """
+    invalidate_products_cache()
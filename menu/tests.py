@@ -1,3 +1,437 @@
-from django.test import TestCase
+import json
+from decimal import Decimal
+from unittest import mock
+from django.apps import apps
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import connection
+from django.db.migrations.autodetector import MigrationAutodetector
+from django.db.migrations.executor import MigrationExecutor
+from django.db.migrations.recorder import MigrationRecorder
+from django.db.migrations.state import ProjectState
+from django.test import TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework.test import APITestCase
+from .models import Products, ProductToppings, Ratings, Toppings
+from .serializers import ProductSerializer
 
-# Create your tests here.
+# Tests use an in-process cache instead of Redis
+TEST_CACHES = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}
+
+
+@override_settings(CACHES=TEST_CACHES)
+class ProductTestCase(APITestCase):
+    """
+    Base test case that starts every test with an empty cache.
+    """
+
+    def setUp(self):
+        cache.clear()
+
+    def create_product(self, **kwargs):
+        values = {
+            'product_name': 'Chicken Shawarma',
+            'product_description': 'The Standard Chicken Shawarma',
+            'product_price': Decimal('70.00'),
+            'product_category': 'Shawarma',
+            'product_type': 'Non-Veg',
+        }
+        values.update(kwargs)
+        return Products.objects.create(**values)
+
+
+class ProductFieldsTests(ProductTestCase):
+    """
+    Tests for the `fields` sparse fieldset on the product list.
+    """
+
+    def setUp(self):
+        super().setUp()
+        self.create_product()
+
+    def test_fields_limits_the_response(self):
+        response = self.client.get(reverse('products'), {'fields': 'product_name,product_price'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['results'], [{'product_name': 'Chicken Shawarma', 'product_price': '70.00'}])
+
+    def test_empty_fields_returns_every_field(self):
+        for fields in [',', ' ']:
+            response = self.client.get(reverse('products'), {'fields': fields})
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(list(response.data['results'][0]), ProductSerializer.Meta.fields)
+
+    def test_unknown_fields_are_rejected(self):
+        response = self.client.get(reverse('products'), {'fields': 'product_name,bogus'})
+        self.assertEqual(response.status_code, 400)
+
+
+class ProductFilterTests(ProductTestCase):
+    """
+    Tests for the product list filters.
+    """
+
+    def setUp(self):
+        super().setUp()
+        self.product = self.create_product()
+
+    def get_product_ids(self, params):
+        response = self.client.get(reverse('products'), params)
+        if response.status_code == 404:
+            return []
+        self.assertEqual(response.status_code, 200)
+        return [row['product_id'] for row in response.data['results']]
+
+    def test_invalid_numbers_are_rejected(self):
+        for params in [{'min_price': 'abc', 'max_price': '100'}, {'min_price': 'NaN', 'max_price': '100'},
+                       {'min_rating': 'Infinity'}, {'min_rating': '1e30'}]:
+            response = self.client.get(reverse('products'), params)
+            self.assertEqual(response.status_code, 400, params)
+
+    def test_zero_price_range_is_applied(self):
+        free_product = self.create_product(product_name='Water', product_price=Decimal('0.00'))
+        self.assertEqual(self.get_product_ids({'min_price': '0', 'max_price': '0'}), [free_product.product_id])
+
+    def add_toppings(self, product, *topping_names):
+        for topping_name in topping_names:
+            topping, _ = Toppings.objects.get_or_create(topping_name=topping_name)
+            ProductToppings.objects.create(product=product, topping=topping)
+
+    def test_toppings_filter(self):
+        falafel = self.create_product(product_name='Falafel Wrap', product_type='Veg')
+        self.add_toppings(self.product, 'Garlic Sauce', 'Cheese')
+        self.add_toppings(falafel, 'Garlic Sauce')
+
+        self.assertEqual(self.get_product_ids({'toppings': 'Cheese'}), [self.product.product_id])
+        # A product with several of the toppings is still listed once
+        self.assertEqual(
+            self.get_product_ids({'toppings': ['Garlic Sauce', 'Cheese']}),
+            [falafel.product_id, self.product.product_id]
+        )
+        self.assertEqual(self.get_product_ids({'toppings': ['Cheese', 'Cheese']}), [self.product.product_id])
+        self.assertEqual(self.get_product_ids({'toppings': 'Pickles'}), [])
+
+    def test_toppings_filter_uses_exists_without_distinct(self):
+        self.add_toppings(self.product, 'Garlic Sauce', 'Cheese')
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(reverse('products'), {'toppings': ['Garlic Sauce', 'Cheese'], 'product_type': 'Non-Veg'})
+        products_sql = queries[0]['sql']
+        self.assertIn('EXISTS', products_sql)
+        self.assertNotIn('DISTINCT', products_sql)
+
+    def test_toppings_filter_with_product_type(self):
+        falafel = self.create_product(product_name='Falafel Wrap', product_type='Veg')
+        self.add_toppings(self.product, 'Garlic Sauce')
+        self.add_toppings(falafel, 'Garlic Sauce')
+
+        self.assertEqual(
+            self.get_product_ids({'toppings': 'Garlic Sauce', 'product_type': 'veg'}), [falafel.product_id]
+        )
+        self.assertEqual(
+            self.get_product_ids({'toppings': 'Garlic Sauce', 'product_type': 'NON-VEG'}), [self.product.product_id]
+        )
+
+    def test_category_filter_ignores_case(self):
+        self.create_product(product_name='Falafel Wrap', product_category='Wraps')
+
+        self.assertEqual(self.get_product_ids({'category': 'shawarma'}), [self.product.product_id])
+        self.assertEqual(self.get_product_ids({'category': 'SHAWARMA'}), [self.product.product_id])
+        # The whole category name has to match
+        self.assertEqual(self.get_product_ids({'category': 'shawar'}), [])
+
+
+class ProductListCacheTests(ProductTestCase):
+    """
+    Tests for caching of product list responses.
+    """
+
+    def setUp(self):
+        super().setUp()
+        self.product = self.create_product()
+        self.create_product(product_name='Falafel Wrap', product_type='Veg')
+
+    def test_repeated_request_is_served_from_cache(self):
+        first = self.client.get(reverse('products'))
+        with self.assertNumQueries(0):
+            second = self.client.get(reverse('products'))
+        self.assertEqual(second.status_code, 200)
+        self.assertEqual(second.data, first.data)
+
+    def test_saving_a_rating_invalidates_the_cache(self):
+        self.client.get(reverse('products'))
+        self.client.get(reverse('products'))
+        Ratings.objects.create(product=self.product, rating_value=Decimal('4.5'))
+
+        response = self.client.get(reverse('products'))
+        ratings = {row['product_id']: row['product_rating'] for row in response.data['results']}
+        self.assertEqual(ratings[self.product.product_id], [Decimal('4.5')])
+
+    def test_unreachable_cache_serves_the_list_uncached(self):
+        with mock.patch('menu.caching.cache') as unreachable_cache:
+            for method in [unreachable_cache.get, unreachable_cache.set, unreachable_cache.get_or_set]:
+                method.side_effect = ConnectionError
+            with self.assertLogs('menu.caching', 'WARNING'):
+                response = self.client.get(reverse('products'))
+                Ratings.objects.create(product=self.product, rating_value=Decimal('4.5'))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data['results']), 2)
+
+    @override_settings(ALLOWED_HOSTS=['testserver', 'api.example.com'])
+    def test_links_are_not_shared_between_hosts(self):
+        self.client.get(reverse('products'), {'page_size': 1})
+        response = self.client.get(reverse('products'), {'page_size': 1}, HTTP_HOST='api.example.com')
+        self.assertTrue(response.data['next'].startswith('http://api.example.com/'))
+
+
+
+class ProductAverageRatingTests(ProductTestCase):
+    """
+    Tests for the denormalized `product_avg_rating` kept up to date by signals.
+    """
+
+    def setUp(self):
+        super().setUp()
+        self.product = self.create_product()
+
+    def get_avg_rating(self):
+        self.product.refresh_from_db(fields=['product_avg_rating'])
+        return self.product.product_avg_rating
+
+    def test_saving_a_rating_recomputes_the_average(self):
+        Ratings.objects.create(product=self.product, rating_value=Decimal('4.0'))
+        self.assertEqual(self.get_avg_rating(), Decimal('4.0'))
+
+        rating = Ratings.objects.create(product=self.product, rating_value=Decimal('3.0'))
+        self.assertEqual(self.get_avg_rating(), Decimal('3.5'))
+
+        rating.rating_value = Decimal('5.0')
+        rating.save()
+        self.assertEqual(self.get_avg_rating(), Decimal('4.5'))
+
+    def test_deleting_a_rating_recomputes_the_average(self):
+        Ratings.objects.create(product=self.product, rating_value=Decimal('4.0'))
+        rating = Ratings.objects.create(product=self.product, rating_value=Decimal('2.0'))
+        rating.delete()
+        self.assertEqual(self.get_avg_rating(), Decimal('4.0'))
+
+        Ratings.objects.filter(product=self.product).delete()
+        self.assertIsNone(self.get_avg_rating())
+
+    def test_ratings_above_ten_are_averaged(self):
+        Ratings.objects.create(product=self.product, rating_value=Decimal('10.0'))
+        Ratings.objects.create(product=self.product, rating_value=Decimal('99.9'))
+        self.assertEqual(self.get_avg_rating(), Decimal('54.95'))
+
+    def test_moving_a_rating_recomputes_both_products(self):
+        other_product = self.create_product(product_name='Falafel Wrap', product_type='Veg')
+        Ratings.objects.create(product=self.product, rating_value=Decimal('4.0'))
+        rating = Ratings.objects.create(product=self.product, rating_value=Decimal('2.0'))
+
+        rating.product = other_product
+        rating.save()
+        self.assertEqual(self.get_avg_rating(), Decimal('4.0'))
+        other_product.refresh_from_db(fields=['product_avg_rating'])
+        self.assertEqual(other_product.product_avg_rating, Decimal('2.0'))
+
+    def test_loading_fixtures_skips_the_recompute(self):
+        rating = Ratings(product=self.product, rating_value=Decimal('4.0'))
+        rating.save_base(raw=True)
+        self.assertIsNone(self.get_avg_rating())
+
+    def test_min_rating_matches_a_repeating_average(self):
+        for rating_value in ['3.0', '3.0', '4.0']:
+            Ratings.objects.create(product=self.product, rating_value=Decimal(rating_value))
+
+        response = self.client.get(reverse('products'), {'min_rating': '3.333'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([row['product_id'] for row in response.data['results']], [self.product.product_id])
+
+        response = self.client.get(reverse('products'), {'min_rating': '3.34'})
+        self.assertEqual(response.status_code, 404)
+
+
+class ProductExportTests(ProductTestCase):
+    """
+    Tests for the streamed, unpaginated product export.
+    """
+
+    def setUp(self):
+        super().setUp()
+        self.admin = User.objects.create_user('admin', password='admin', is_staff=True)
+        self.products = [self.create_product(product_name=f'Product {i}') for i in range(5)]
+        Ratings.objects.create(product=self.products[0], rating_value=Decimal('4.5'))
+
+    def test_export_streams_every_product(self):
+        self.client.force_authenticate(self.admin)
+        # A small chunk size makes the export span several chunks
+        with mock.patch('menu.views.PRODUCTS_STREAM_CHUNK_SIZE', 2):
+            response = self.client.get(reverse('products-export'))
+            body = b''.join(response.streaming_content)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'application/json')
+        rows = json.loads(body)
+        self.assertEqual(sorted(row['product_id'] for row in rows), [product.product_id for product in self.products])
+        ratings = {row['product_id']: row['product_rating'] for row in rows}
+        self.assertEqual(ratings[self.products[0].product_id], [4.5])
+
+    def test_export_applies_filters_and_fields(self):
+        self.client.force_authenticate(self.admin)
+        response = self.client.get(reverse('products-export'), {'min_rating': '4', 'fields': 'product_id'})
+        self.assertEqual(json.loads(b''.join(response.streaming_content)), [{'product_id': self.products[0].product_id}])
+
+    def test_export_without_matches_returns_404(self):
+        self.client.force_authenticate(self.admin)
+        response = self.client.get(reverse('products-export'), {'category': 'missing'})
+        self.assertEqual(response.status_code, 404)
+
+    def test_export_skips_the_cache(self):
+        self.client.force_authenticate(self.admin)
+        with mock.patch('menu.views.get_cached_products') as get_cached_products:
+            response = self.client.get(reverse('products-export'))
+            b''.join(response.streaming_content)
+        get_cached_products.assert_not_called()
+
+    def test_export_requires_an_admin_user(self):
+        user = User.objects.create_user('user', password='user')
+        self.client.force_authenticate(user)
+        response = self.client.get(reverse('products-export'))
+        self.assertEqual(response.status_code, 403)
+
+
+class ProductCreateTests(ProductTestCase):
+    """
+    Tests for the product create response.
+    """
+
+    def test_create_returns_the_product_in_field_order(self):
+        user = User.objects.create_user('user', password='user')
+        self.client.force_authenticate(user)
+        data = {
+            'product_type': 'Veg',
+            'product_price': '70',
+            'product_name': 'Falafel Wrap',
+            'product_category': 'Wraps',
+            'product_description': 'Falafel with tahini',
+        }
+        response = self.client.post(reverse('products-create'), data, format='json')
+
+        self.assertEqual(response.status_code, 201)
+        product = Products.objects.get()
+        self.assertEqual(list(response.data), ProductSerializer.Meta.fields)
+        self.assertEqual(response.data, ProductSerializer(product).data)
+        self.assertEqual(response.data['product_price'], '70.00')
+        self.assertEqual(response.data['product_toppings'], [])
+        self.assertEqual(response.data['product_rating'], [])
+
+
+class ProductSerializerTests(ProductTestCase):
+    """
+    Tests for loading ratings and toppings in ProductSerializer.
+    """
+
+    def test_loads_only_the_missing_relation(self):
+        product = self.create_product()
+        Ratings.objects.create(product=product, rating_value=Decimal('4.0'))
+        product._toppings = ['cheese']
+
+        with self.assertNumQueries(1):
+            data = ProductSerializer(product).data
+        self.assertEqual(data['product_rating'], [Decimal('4.0')])
+        self.assertEqual(data['product_toppings'], ['cheese'])
+
+
+class MenuMigrationTests(TransactionTestCase):
+    """
+    Tests that run the menu migrations against tables laid out like the
+    existing database, which predates the migrations.
+    """
+    available_apps = ['menu']
+
+    def setUp(self):
+        self.drop_menu_tables()
+        # 0003 adds the existing foreign key columns to the migration state only,
+        # so the existing tables are the 0003 state without its product_type index
+        loader = MigrationExecutor(connection).loader
+        old_apps = loader.project_state(('menu', '0002_alter_products_options_alter_producttoppings_options_and_more')).apps
+        new_apps = loader.project_state(('menu', '0003_products_type_index')).apps
+        with connection.schema_editor() as editor:
+            for model_name in ['Products', 'ToppingsGroups']:
+                editor.create_model(old_apps.get_model('menu', model_name))
+            for model_name in ['ProductToppings', 'Ratings', 'Toppings']:
+                editor.create_model(new_apps.get_model('menu', model_name))
+
+    def tearDown(self):
+        # Leave the tables the way the rest of the suite expects them
+        self.drop_menu_tables()
+        with connection.schema_editor() as editor:
+            for model in apps.get_app_config('menu').get_models():
+                editor.create_model(model)
+
+    def drop_menu_tables(self):
+        """
+        Drop the menu tables and forget which menu migrations were applied.
+        """
+        recorder = MigrationRecorder(connection)
+        recorder.ensure_schema()
+        recorder.migration_qs.filter(app='menu').delete()
+        tables = connection.introspection.table_names()
+        with connection.schema_editor() as editor:
+            for model in apps.get_app_config('menu').get_models():
+                if model._meta.db_table in tables:
+                    editor.delete_model(model)
+
+    def migrate(self, target):
+        """
+        Migrate the menu app to `target` and return the app registry at that state.
+        """
+        executor = MigrationExecutor(connection)
+        executor.migrate([target])
+        return executor.loader.project_state(target).apps
+
+    def test_migrations_match_the_models(self):
+        self.migrate(('menu', '0007_products_product_avg_rating'))
+        executor = MigrationExecutor(connection)
+        autodetector = MigrationAutodetector(executor.loader.project_state(), ProjectState.from_apps(apps))
+        self.assertEqual(autodetector.changes(graph=executor.loader.graph), {})
+
+    def test_stale_topping_groups_are_cleared(self):
+        old_apps = self.migrate(('menu', '0005_products_ratings_filter_indexes'))
+        Products = old_apps.get_model('menu', 'Products')
+        ProductToppings = old_apps.get_model('menu', 'ProductToppings')
+        Toppings = old_apps.get_model('menu', 'Toppings')
+        ToppingsGroups = old_apps.get_model('menu', 'ToppingsGroups')
+        # group_id still references product_toppings, which references toppings
+        with connection.constraint_checks_disabled():
+            product = Products.objects.create(
+                product_name='Chicken Shawarma', product_description='The Standard Chicken Shawarma',
+                product_price=Decimal('70.00'), product_category='Shawarma', product_type='Non-Veg'
+            )
+            kept = Toppings.objects.create(topping_name='Garlic Sauce', group_id=1)
+            stale = Toppings.objects.create(topping_name='Cheese', group_id=2)
+            ProductToppings.objects.create(id=1, product=product, topping=kept)
+            ProductToppings.objects.create(id=2, product=product, topping=stale)
+        ToppingsGroups.objects.create(group_id=1, group_name='Sauces')
+
+        new_apps = self.migrate(('menu', '0006_alter_toppings_group'))
+        Toppings = new_apps.get_model('menu', 'Toppings')
+        self.assertEqual(Toppings.objects.get(topping_name='Garlic Sauce').group_id, 1)
+        self.assertIsNone(Toppings.objects.get(topping_name='Cheese').group_id)
+
+    def test_average_ratings_are_backfilled(self):
+        old_apps = self.migrate(('menu', '0006_alter_toppings_group'))
+        Products = old_apps.get_model('menu', 'Products')
+        Ratings = old_apps.get_model('menu', 'Ratings')
+        values = {
+            'product_description': 'The Standard Chicken Shawarma', 'product_price': Decimal('70.00'),
+            'product_category': 'Shawarma', 'product_type': 'Non-Veg',
+        }
+        rated = Products.objects.create(product_name='Chicken Shawarma', **values)
+        Products.objects.create(product_name='Beef Shawarma', **values)
+        for rating_value in ['4.0', '5.0', '10.0']:
+            Ratings.objects.create(product=rated, rating_value=Decimal(rating_value))
+
+        new_apps = self.migrate(('menu', '0007_products_product_avg_rating'))
+        Products = new_apps.get_model('menu', 'Products')
+        self.assertEqual(Products.objects.get(product_name='Chicken Shawarma').product_avg_rating, Decimal('6.3333'))
+        self.assertIsNone(Products.objects.get(product_name='Beef Shawarma').product_avg_rating)
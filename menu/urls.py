@@ -1,8 +1,9 @@
 from django.urls import path
-from .views import ProductsListView, ProductUpdateDeleteView, ProductCreateView, ProductRetriveView
+from .views import ProductsListView, ProductExportView, ProductUpdateDeleteView, ProductCreateView, ProductRetriveView
 
 urlpatterns = [
     path('', ProductsListView.as_view(), name='products'),
+    path('export/', ProductExportView.as_view(), name='products-export'),
     path('create/', ProductCreateView.as_view(), name='products-create'),
     path('product/<int:pk>/', ProductRetriveView.as_view(), name='product-detail'),
     path('<int:pk>/', ProductUpdateDeleteView.as_view(), name='product-detail')
@@ -1,30 +1,98 @@
-from django.db.models import Avg
+from decimal import Decimal, InvalidOperation
+from itertools import islice
+from django.http import StreamingHttpResponse
+from django.db.models import Exists, OuterRef, Q
 from rest_framework import generics, status
 from rest_framework.response import Response
 from rest_framework.filters import BaseFilterBackend
-from rest_framework.pagination import PageNumberPagination
+from rest_framework.pagination import CursorPagination
 from rest_framework.exceptions import NotFound, ValidationError
-from rest_framework.permissions import IsAuthenticated
-from .models import Products
+from rest_framework.permissions import IsAdminUser, IsAuthenticated
+from .models import Products, ProductToppings
 from .serializers import ProductSerializer
+from .caching import cache_products, get_cached_products
+from .renderers import ORJSONRenderer
 # Create your views here.
 
-class ProductPagination(PageNumberPagination):
+# Maps lower-cased product types to their stored values, e.g. 'non-veg' -> 'Non-Veg'
+PRODUCT_TYPES = {value.lower(): value for value, _ in Products.PRODUCT_TYPE}
+
+# min_rating is compared at the precision Products.product_avg_rating is stored with
+AVG_RATING_PRECISION = Decimal('0.0001')
+
+# Number of products serialized per chunk when streaming an unpaginated list
+PRODUCTS_STREAM_CHUNK_SIZE = 500
+
+# Product columns rendered by ProductSerializer
+PRODUCT_COLUMNS = ['product_id', 'product_name', 'product_description', 'product_price',
+                   'product_category', 'product_type']
+
+def get_requested_fields(request):
+    """
+    Parse the `fields` query parameter into a sparse fieldset.
+
+    Example:
+    URL: /menu/?fields=product_name,product_price
+
+    Returns:
+        A list of field names, or None when the parameter is not given or names no fields.
+
+    Raises:
+        ValidationError: If any requested field is not a product field.
+    """
+    fields = request.query_params.get('fields')
+    if not fields:
+        return None
+    requested_fields = [field.strip() for field in fields.split(',') if field.strip()]
+    if not requested_fields:
+        # e.g. `?fields=,` names no fields; treat it like no sparse fieldset
+        return None
+    unknown_fields = set(requested_fields) - set(ProductSerializer.Meta.fields)
+    if unknown_fields:
+        raise ValidationError({"fields": f"Unknown fields: {', '.join(sorted(unknown_fields))}."})
+    return requested_fields
+
+def get_decimal_param(request, name):
+    """
+    Parse a numeric query parameter into a Decimal.
+
+    Returns:
+        The parsed value, or None when the parameter is not given.
+
+    Raises:
+        ValidationError: If the value is not a finite number.
+    """
+    value = request.query_params.get(name)
+    if not value:
+        return None
+    try:
+        number = Decimal(value)
+    except InvalidOperation:
+        number = None
+    if number is None or not number.is_finite():
+        raise ValidationError({name: "A valid number is required."})
+    return number
+
+class ProductPagination(CursorPagination):
     """
     Custom pagination class for listing products.
     
     This class handles pagination for the list of products in the API. 
     It provides the following features:
     
+    - Uses cursor (keyset) pagination on `product_id`, so every page costs the same
+      regardless of how deep the client pages, unlike LIMIT/OFFSET.
     - Limits the number of products returned per page (default is 10).
     - Allows clients to specify a custom page size via the 'page_size' query parameter.
     - Restricts the maximum page size to 100 products per page.
 
     Attributes:
+        ordering (str): The field the cursor is keyed on. Newest products are returned first.
         page_size (int): The default number of products to return per page. Default is set to 10.
         page_size_query_param (str): The name of the query parameter that allows clients to specify a custom page size. Default is 'page_size'.
         max_page_size (int): The maximum limit on the number of products that can be requested per page. Default is set to 100.
     """
+    ordering = '-product_id'  # Cursor key, backed by the primary key index
     page_size = 10  # Number of products per page
     page_size_query_param = 'page_size'  # Allow clients to specify page size
     max_page_size = 100  # Maximum page size limit
@@ -40,43 +108,70 @@ class ProductFilterBackend(BaseFilterBackend):
     Methods:
         filter_queryset(request, queryset, view):
             Filters the queryset based on the following query parameters:
-                - min_price: Filters products by minimum price.
-                - max_price: Filters products by maximum price.
-                - min_rating: Filters products by minimum average rating.
-                - category: Filters products by category name.
+                - min_price: Filters products by minimum price (used together with max_price).
+                - max_price: Filters products by maximum price (used together with min_price).
+                - min_rating: Filters products by minimum average rating (compared to 4 decimal places).
+                - category: Filters products by category name (case-insensitive exact match).
                 - toppings: Filters products by a list of toppings.
-                - product_type: Filters products by exact match of product type.
+                - product_type: Filters products by product type (case-insensitive).
+                - fields: Loads only the requested product columns.
+
+            Numeric parameters are parsed once; invalid values raise a ValidationError (400).
 
     Attributes:
         None
     """
 
     def filter_queryset(self, request, queryset, view):
+        # Collect every condition into one Q tree and apply it with a single filter()
+        conditions = Q()
+
         # Filter by price range
-        min_price = request.query_params.get('min_price')
-        max_price = request.query_params.get('max_price')
-        if min_price and max_price:
-            queryset = queryset.filter(product_price__gte=min_price, product_price__lte=max_price)
+        min_price = get_decimal_param(request, 'min_price')
+        max_price = get_decimal_param(request, 'max_price')
+        if min_price is not None and max_price is not None:
+            conditions &= Q(product_price__gte=min_price, product_price__lte=max_price)
 
         # Filter by average rating
-        min_rating = request.query_params.get('min_rating')
-        if min_rating:
-            queryset = queryset.annotate(avg_rating=Avg('ratings__rating_value')).filter(avg_rating__gte=min_rating)
+        min_rating = get_decimal_param(request, 'min_rating')
+        if min_rating is not None:
+            # Uses the denormalized average instead of aggregating ratings per request,
+            # rounding min_rating the same way the stored average was rounded
+            try:
+                min_rating = min_rating.quantize(AVG_RATING_PRECISION)
+            except InvalidOperation:
+                raise ValidationError({"min_rating": "A valid number is required."})
+            conditions &= Q(product_avg_rating__gte=min_rating)
 
         # Filter by category
         category = request.query_params.get('category')
         if category:
-            queryset = queryset.filter(product_category__icontains=category)
+            conditions &= Q(product_category__iexact=category)
 
-        # Filter by toppings
-        toppings = request.query_params.getlist('toppings')
+        # Filter by toppings, ignoring repeated names
+        toppings = set(request.query_params.getlist('toppings'))
         if toppings:
-            queryset = queryset.filter(producttoppings__topping__topping_name__in=toppings).distinct()
+            # EXISTS avoids joining every matching topping row and de-duplicating with DISTINCT
+            product_toppings = ProductToppings.objects.filter(
+                product=OuterRef('pk'), topping__topping_name__in=toppings
+            )
+            conditions &= Exists(product_toppings)
 
         # Filter by product type
         product_type = request.query_params.get('product_type')
         if product_type:
-            queryset = queryset.filter(product_type__iexact=product_type)
+            # Normalise to the stored choice value so the exact match can use the index
+            product_type = PRODUCT_TYPES.get(product_type.lower(), product_type)
+            conditions &= Q(product_type=product_type)
+
+        if conditions:
+            queryset = queryset.filter(conditions)
+
+        # Load only the requested columns; product_id is always needed for the cursor
+        requested_fields = get_requested_fields(request)
+        if requested_fields:
+            columns = [field for field in requested_fields if field in PRODUCT_COLUMNS]
+            queryset = queryset.only('product_id', *columns)
 
         return queryset
 class ProductsListView(generics.ListAPIView):
@@ -95,26 +190,94 @@ class ProductsListView(generics.ListAPIView):
     # Filter backends
     filter_backends = [ProductFilterBackend]
 
+    def get_queryset(self):
+        """
+        Return the view's queryset limited to the columns the serializer renders.
+        """
+        return super().get_queryset().only(*PRODUCT_COLUMNS)
+
+    def get_product_serializer(self, products):
+        """
+        Build a list serializer for the given products.
+
+        Honours the `fields` query parameter: only the requested fields are
+        rendered, and ratings or toppings are only loaded when requested.
+        """
+        fields = get_requested_fields(self.request)
+        return self.get_serializer(products, many=True, fields=fields)
+
+    def stream_products(self, first_chunk, products):
+        """
+        Yield the products as a JSON array, serializing one chunk at a time.
+
+        Args:
+            first_chunk: The products already read to check the result is not empty.
+            products: An iterator over the remaining products.
+        """
+        renderer = ORJSONRenderer()
+        chunk = first_chunk
+        yield b'['
+        while chunk:
+            rows = renderer.render(self.get_product_serializer(chunk).data)
+            # Drop the chunk's own brackets so the chunks join into one array
+            yield rows[1:-1]
+            chunk = list(islice(products, PRODUCTS_STREAM_CHUNK_SIZE))
+            if chunk:
+                yield b','
+        yield b']'
+
     def list(self, request, *args, **kwargs):
         """
         List all products.
 
         - If products exist, returns a 200 status with the list of products.
         - If no products exist, returns a 404 status with a message.
+
+        Successful paginated responses are cached per set of query parameters and
+        dropped whenever products, ratings or toppings change; if the cache cannot
+        be reached the list is served uncached. Without pagination the products
+        are streamed instead.
         """
+        if self.paginator is not None:
+            cache_key, data = get_cached_products(request)
+            if data is not None:
+                return Response(data)
+
         queryset = self.filter_queryset(self.get_queryset())
 
-        if not queryset.exists():
-            return Response({"message": "No products found"}, status=status.HTTP_404_NOT_FOUND)
-            
-        # Pagination is automatically handled by DRF, but you can customize it here
+        # Pagination is automatically handled by DRF, but you can customize it here.
+        # The empty check reuses the fetched rows instead of a separate EXISTS query.
         page = self.paginate_queryset(queryset)
         if page is not None:
-            serializer = self.get_serializer(page, many=True)
-            return self.get_paginated_response(serializer.data)
-        
-        serializer = self.get_serializer(queryset, many=True)
-        return Response(serializer.data)
+            if not page:
+                return Response({"message": "No products found"}, status=status.HTTP_404_NOT_FOUND)
+            serializer = self.get_product_serializer(page)
+            response = self.get_paginated_response(serializer.data)
+            cache_products(cache_key, response.data)
+            return response
+
+        # Without pagination, stream the products in chunks rather than
+        # materializing and serializing the whole table at once
+        products = queryset.iterator(chunk_size=PRODUCTS_STREAM_CHUNK_SIZE)
+        first_chunk = list(islice(products, PRODUCTS_STREAM_CHUNK_SIZE))
+        if not first_chunk:
+            return Response({"message": "No products found"}, status=status.HTTP_404_NOT_FOUND)
+        return StreamingHttpResponse(
+            self.stream_products(first_chunk, products), content_type=ORJSONRenderer.media_type
+        )
+
+class ProductExportView(ProductsListView):
+    """
+    View for exporting every product in one response, for admin users.
+
+    Methods:
+    - GET: Streams all products matching the filters as a single JSON array.
+      - Supports the same filters and `fields` parameter as the product list.
+      - Response 200: Returns the products, serialized in chunks.
+      - Response 404: Returns an error if no products match.
+    """
+    pagination_class = None
+    permission_classes = [IsAdminUser]
 
 class ProductCreateView(generics.CreateAPIView):
     """
@@ -148,22 +311,27 @@ class ProductCreateView(generics.CreateAPIView):
         """
         serializer = self.get_serializer(data=request.data)
         if serializer.is_valid():
-            serializer.save()
-            return Response(serializer.data, status=status.HTTP_201_CREATED)
+            product = serializer.save()
+            # Build the response from the validated input rather than re-serializing
+            # the saved product; a new product has no ratings or toppings yet.
+            # Keys follow the serializer's field order, like the other endpoints.
+            values = {"product_id": product.pk, "product_toppings": [], "product_rating": []}
+            payload = {}
+            for field_name, field in serializer.fields.items():
+                if field_name in values:
+                    payload[field_name] = values[field_name]
+                elif field_name in serializer.validated_data:
+                    payload[field_name] = field.to_representation(serializer.validated_data[field_name])
+            return Response(payload, status=status.HTTP_201_CREATED)
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
-class ProductRetriveView(generics.RetrieveAPIView):
+class ProductObjectMixin:
     """
-    View for retrieving a product by ID.
+    Mixin for views that operate on a single product identified by `pk`.
 
-    Methods:
-    - GET: Retrieves a specific product by its ID.
-      - Path Parameter: `pk` (primary key of the product).
-      - Response 200: Returns the product's data.
-      - Response 404: Returns an error if the product does not exist.
-      
+    The product is looked up once per request, loading only the columns the
+    serializer renders, and reused by every later `get_object` call.
     """
-    serializer_class = ProductSerializer
 
     def get_object(self):
         """
@@ -175,14 +343,28 @@ class ProductRetriveView(generics.RetrieveAPIView):
         Example:
         URL: /products/1/
         """
-        try:
-            queryset = Products.objects.get(product_id=self.kwargs['pk'])
-        except Products.DoesNotExist:
-            # Custom error for when the product is not found
-            raise NotFound(detail="Product not found.", code=status.HTTP_404_NOT_FOUND)
-        return queryset
+        if not hasattr(self, '_product'):
+            try:
+                self._product = Products.objects.only(*PRODUCT_COLUMNS).get(product_id=self.kwargs['pk'])
+            except Products.DoesNotExist:
+                # Custom error for when the product is not found
+                raise NotFound(detail="Product not found.", code=status.HTTP_404_NOT_FOUND)
+        return self._product
+
+class ProductRetriveView(ProductObjectMixin, generics.RetrieveAPIView):
+    """
+    View for retrieving a product by ID.
+
+    Methods:
+    - GET: Retrieves a specific product by its ID.
+      - Path Parameter: `pk` (primary key of the product).
+      - Response 200: Returns the product's data.
+      - Response 404: Returns an error if the product does not exist.
+      
+    """
+    serializer_class = ProductSerializer
 
-class ProductUpdateDeleteView(generics.UpdateAPIView,generics.DestroyAPIView):
+class ProductUpdateDeleteView(ProductObjectMixin, generics.UpdateAPIView, generics.DestroyAPIView):
     """
     View for updating, or deleting a product by ID.
 
@@ -201,23 +383,6 @@ class ProductUpdateDeleteView(generics.UpdateAPIView,generics.DestroyAPIView):
     serializer_class = ProductSerializer
     permission_classes = [IsAuthenticated]
 
-    def get_object(self):
-        """
-        Retrieve a product by its primary key (pk).
-
-        Raises:
-        - NotFound: If the product does not exist.
-
-        Example:
-        URL: /products/1/
-        """
-        try:
-            queryset = Products.objects.get(product_id=self.kwargs['pk'])
-        except Products.DoesNotExist:
-            # Custom error for when the product is not found
-            raise NotFound(detail="Product not found.", code=status.HTTP_404_NOT_FOUND)
-        return queryset
-        
     def update(self, request, *args, **kwargs):
         """
         Update a product's details by its primary key (pk).